@@ -20,6 +20,8 @@
 from __future__ import absolute_import, division, unicode_literals
 
 import os
+import sys
+import zlib
 from functools import wraps
 from time import time
 
@@ -41,6 +43,33 @@ try:  # Python 2
 except NameError:  # Python 3
     unicode = str  # pylint: disable=redefined-builtin
 
+# The Python version can not change at runtime, so choose here once the conversions that depend on it,
+# instead of checking the version at each load/save of the cache data
+if sys.version_info.major == 2:
+    # On Python 2 pickle works with str, which is what window properties and files use
+    def _from_wndprop(wnd_property_data):
+        return wnd_property_data
+
+    def _to_wndprop(pickled_data):
+        return pickled_data
+
+    def _read_file(handle):
+        return handle.read()
+else:
+    # Note: On python 3 pickle.dumps produces byte not str cannot be passed as is in
+    # setProperty because cannot receive arbitrary byte sequences if they contain
+    # null bytes \x00, the stored value will be truncated by this null byte (Kodi bug).
+    # To store pickled data in Python 3, you should use protocol 0 explicitly and decode
+    # the resulted value with latin-1 encoding to str and then pass it to setPropety.
+    def _from_wndprop(wnd_property_data):
+        return wnd_property_data.encode('latin-1')
+
+    def _to_wndprop(pickled_data):
+        return pickled_data.decode('latin-1')
+
+    def _read_file(handle):
+        return handle.readBytes()
+
 CACHE_COMMON = 'cache_common'
 CACHE_GENRES = 'cache_genres'
 CACHE_SUPPLEMENTAL = 'cache_supplemental'
@@ -57,6 +86,13 @@ BUCKET_LOCKED = 'LOCKED_BY_{:04d}_AT_{}'
 # 100 years TTL should be close enough to infinite
 TTL_INFINITE = 60 * 60 * 24 * 365 * 100
 
+# Serialized data bigger than this size (in bytes) is compressed
+COMPRESSION_THRESHOLD = 4096
+
+# Tag bytes stored at the beginning of the serialized data, to identify serializer and compression
+TAG_PICKLE = b'P'
+TAG_PICKLE_ZLIB = b'Z'
+
 
 class CacheMiss(Exception):
     """Requested item is not in the cache"""
@@ -87,15 +123,15 @@ def cache_output(bucket, fixed_identifier=None,
     """Decorator that ensures caching the output of a function"""
     # pylint: disable=missing-docstring, invalid-name, too-many-arguments
     def caching_decorator(func):
+        get_identifier = _get_identifier_func(fixed_identifier,
+                                              identify_from_kwarg_name,
+                                              identify_append_from_kwarg_name,
+                                              identify_fallback_arg_index)
+
         @wraps(func)
         def wrapper(*args, **kwargs):
             try:
-                identifier = _get_identifier(fixed_identifier,
-                                             identify_from_kwarg_name,
-                                             identify_append_from_kwarg_name,
-                                             identify_fallback_arg_index,
-                                             args,
-                                             kwargs)
+                identifier = get_identifier(args, kwargs)
                 if save_call_data and not g.IS_ADDON_EXTERNAL_CALL:
                     g.LOCAL_DB.set_value('cache_last_directory_call',
                                          {'bucket': bucket, 'identifier': identifier, 'to_disk': to_disk},
@@ -103,7 +139,9 @@ def cache_output(bucket, fixed_identifier=None,
                 if not identifier:
                     # Do not cache if identifier couldn't be determined
                     return func(*args, **kwargs)
-                return g.CACHE.get(bucket, identifier)
+                # The output is written to disk only with to_disk, otherwise looking for it
+                # on disk is a useless file system access at each cache miss
+                return g.CACHE.get(bucket, identifier, use_disk_fallback=to_disk)
             except CacheMiss:
                 output = func(*args, **kwargs)
                 g.CACHE.add(bucket, identifier, output, ttl=ttl,
@@ -113,22 +151,31 @@ def cache_output(bucket, fixed_identifier=None,
     return caching_decorator
 
 
-def _get_identifier(fixed_identifier, identify_from_kwarg_name,
-                    identify_append_from_kwarg_name, identify_fallback_arg_index, args, kwargs):
-    """Return the identifier to use with the caching_decorator"""
-    # common.debug('Get_identifier args: {}', args)
-    # common.debug('Get_identifier kwargs: {}', kwargs)
+def _get_identifier_func(fixed_identifier, identify_from_kwarg_name,
+                         identify_append_from_kwarg_name, identify_fallback_arg_index):
+    """Return the function that gets the identifier to use with the caching_decorator.
+    The decorator params never change, so the logic to apply is chosen only once"""
+    # pylint: disable=unused-argument
     if fixed_identifier:
-        identifier = fixed_identifier
-    else:
+        return lambda args, kwargs: fixed_identifier
+
+    if not identify_append_from_kwarg_name:
+        def get_identifier(args, kwargs):
+            identifier = kwargs.get(identify_from_kwarg_name)
+            if not identifier and args:
+                identifier = args[identify_fallback_arg_index]
+            return identifier
+        return get_identifier
+
+    def get_identifier_append(args, kwargs):
         identifier = kwargs.get(identify_from_kwarg_name)
         if not identifier and args:
             identifier = args[identify_fallback_arg_index]
-        if identifier and identify_append_from_kwarg_name and \
-           kwargs.get(identify_append_from_kwarg_name):
-            identifier += '_' + kwargs.get(identify_append_from_kwarg_name)
-    # common.debug('Get_identifier identifier value: {}', identifier if identifier else 'None')
-    return identifier
+        append_value = kwargs.get(identify_append_from_kwarg_name)
+        if identifier and append_value:
+            identifier += '_' + append_value
+        return identifier
+    return get_identifier_append
 
 
 # def inject_from_cache(cache, bucket, injection_param,
@@ -167,6 +214,9 @@ class Cache(object):
         self.window = xbmcgui.Window(10000)  # Kodi home window
         # If you use multiple Kodi profiles you need to distinguish the cache of the current profile
         self.properties_prefix = common.get_current_kodi_profile_name()
+        # The property names depend only on the Kodi profile, so build them once
+        self.window_properties = {bucket: g.py2_encode('nfmemcache_{}_{}'.format(self.properties_prefix, bucket))
+                                  for bucket in BUCKET_NAMES}
         if g.IS_SERVICE:
             common.register_slot(self.invalidate_callback, signal=common.Signals.INVALIDATE_SERVICE_CACHE)
 
@@ -185,7 +235,8 @@ class Cache(object):
             if not use_disk_fallback:
                 raise CacheMiss()
             cache_entry = self._get_from_disk(bucket, identifier)
-            self.add(bucket, identifier, cache_entry['content'])
+            # Keep the deserialized entry as is in the in-memory bucket (also preserve its EOL)
+            self._get_bucket(bucket)[identifier] = cache_entry
         self.verify_ttl(bucket, identifier, cache_entry)
         return cache_entry['content']
 
@@ -253,10 +304,14 @@ class Cache(object):
     def _get_bucket(self, key):
         """Get a cache bucket.
         Load it lazily from window property if it's not yet in memory"""
+        try:
+            # Fast path, bucket already loaded
+            return self.buckets[key]
+        except KeyError:
+            pass
         if key not in BUCKET_NAMES:
             raise UnknownCacheBucketError()
-        if key not in self.buckets:
-            self.buckets[key] = self._load_bucket(key)
+        self.buckets[key] = self._load_bucket(key)
         return self.buckets[key]
 
     def _load_bucket(self, bucket):
@@ -275,11 +330,7 @@ class Cache(object):
 
     def _load_bucket_from_wndprop(self, bucket, wnd_property_data):
         try:
-            if g.PY_IS_VER2:
-                # pickle.loads on py2 wants string
-                bucket_instance = pickle.loads(wnd_property_data)
-            else:
-                bucket_instance = pickle.loads(wnd_property_data.encode('latin-1'))
+            bucket_instance = pickle.loads(_from_wndprop(wnd_property_data))
         except Exception:  # pylint: disable=broad-except
             # When window.getProperty does not have the property here happen an error
             common.debug('No instance of {} found. Creating new instance.'.format(bucket))
@@ -298,11 +349,7 @@ class Cache(object):
             raise CacheMiss()
         handle = xbmcvfs.File(cache_filename, 'rb')
         try:
-            if g.PY_IS_VER2:
-                # pickle.loads on py2 wants string
-                return pickle.loads(handle.read())
-            # py3
-            return pickle.loads(handle.readBytes())
+            return _deserialize_data(_read_file(handle))
         except Exception as exc:
             common.error('Failed get cache from disk {}: {}', cache_filename, exc)
             raise CacheMiss()
@@ -314,8 +361,7 @@ class Cache(object):
         cache_filename = self._entry_filename(bucket, identifier)
         handle = xbmcvfs.File(cache_filename, 'wb')
         try:
-            # return pickle.dump(cache_entry, handle)
-            handle.write(bytearray(pickle.dumps(cache_entry)))
+            handle.write(bytearray(_serialize_data(cache_entry)))
         except Exception as exc:  # pylint: disable=broad-except
             common.error('Failed to write cache entry to {}: {}', cache_filename, exc)
         finally:
@@ -329,17 +375,14 @@ class Cache(object):
         if not self.is_safe_to_persist(bucket):
             common.warn('{} is locked by another instance. Discarding changes'.format(bucket))
             return
+        # Drop the expired entries, otherwise they are never removed until they are accessed
+        # and will be serialized/deserialized at each add-on invocation
+        timestamp = int(time())
+        contents = {identifier: cache_entry for identifier, cache_entry in contents.items()
+                    if cache_entry['eol'] >= timestamp}
         try:
-            if g.PY_IS_VER2:
-                self.window.setProperty(self._window_property(bucket), pickle.dumps(contents))
-            else:
-                # Note: On python 3 pickle.dumps produces byte not str cannot be passed as is in
-                # setProperty because cannot receive arbitrary byte sequences if they contain
-                # null bytes \x00, the stored value will be truncated by this null byte (Kodi bug).
-                # To store pickled data in Python 3, you should use protocol 0 explicitly and decode
-                # the resulted value with latin-1 encoding to str and then pass it to setPropety.
-                self.window.setProperty(self._window_property(bucket),
-                                        pickle.dumps(contents, protocol=0).decode('latin-1'))
+            self.window.setProperty(self._window_property(bucket),
+                                    _to_wndprop(pickle.dumps(contents, protocol=0)))
         except Exception as exc:  # pylint: disable=broad-except
             common.error('Failed to persist {} to wnd properties: {}', bucket, exc)
             self.window.clearProperty(self._window_property(bucket))
@@ -373,20 +416,39 @@ class Cache(object):
             raise CacheMiss()
 
     def _purge_entry(self, bucket, identifier, on_disk=False):
-        # To ensure removing disk cache, it must be loaded first or it will trigger an exception
         cache_filename = self._entry_filename(bucket, identifier)
         cache_exixts = os.path.exists(cache_filename)
 
-        if on_disk and cache_exixts:
-            cache_entry = self._get_from_disk(bucket, identifier)
-            self.add(bucket, identifier, cache_entry['content'])
-
-        # Remove from in-memory cache
-        del self._get_bucket(bucket)[identifier]
+        # Remove from in-memory cache, there is no need to load the entry from disk
+        # just to delete it, raise KeyError only when the entry does not exist at all
+        bucket_content = self._get_bucket(bucket)
+        if identifier not in bucket_content and not (on_disk and cache_exixts):
+            raise KeyError(identifier)
+        bucket_content.pop(identifier, None)
 
         # Remove from disk cache if it exists
         if cache_exixts:
             os.remove(cache_filename)
 
     def _window_property(self, bucket):
-        return g.py2_encode('nfmemcache_{}_{}'.format(self.properties_prefix, bucket))
+        return self.window_properties[bucket]
+
+
+def _serialize_data(value):
+    """Serialize a cache entry to bytes, the result starts with a tag byte (see TAG_* constants)"""
+    data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+    if len(data) > COMPRESSION_THRESHOLD:
+        # Metadata are repetitive JSON-like data, even the fastest compression level reduces them a lot
+        return TAG_PICKLE_ZLIB + zlib.compress(data, 1)
+    return TAG_PICKLE + data
+
+
+def _deserialize_data(value):
+    """Deserialize a cache entry serialized by _serialize_data"""
+    tag = value[:1]
+    if tag == TAG_PICKLE_ZLIB:
+        return pickle.loads(zlib.decompress(value[1:]))
+    if tag == TAG_PICKLE:
+        return pickle.loads(value[1:])
+    # Data written by an unknown serializer, or cache file of a previous add-on version
+    raise ValueError('Unknown cache data format')
@@ -10,11 +10,13 @@
 from __future__ import absolute_import, division, unicode_literals
 
 import os
+import shutil
 
 import xbmc
 import xbmcvfs
 
 from resources.lib.globals import g
+from .logging import error
 
 
 def check_folder_path(path):
@@ -30,6 +32,16 @@ def check_folder_path(path):
     return path + end
 
 
+def is_local_path(translated_path):
+    """
+    Checks if a path (already translated with xbmc.translatePath) is a local file system path,
+    so that it can be accessed with native file operations, instead of xbmcvfs
+    :param translated_path: The translated path
+    :return: True if local, False for Kodi virtual file system paths (smb://, nfs://, ...)
+    """
+    return '://' not in g.py2_decode(translated_path)
+
+
 def folder_exists(path):
     """
     Checks if a given path exists
@@ -112,6 +124,11 @@ def delete_folder_contents(path, delete_subfolders=False):
     :param path: Path to perform delete contents
     :param delete_subfolders: If True delete also all subfolders
     """
+    translated_path = g.py2_decode(xbmc.translatePath(path))
+    if is_local_path(translated_path):
+        # With a local file system path avoid the xbmcvfs file by file deletion
+        _delete_local_folder_contents(translated_path, delete_subfolders)
+        return
     directories, files = list_dir(path)
     for filename in files:
         xbmcvfs.delete(os.path.join(path, filename))
@@ -124,6 +141,36 @@ def delete_folder_contents(path, delete_subfolders=False):
         xbmcvfs.rmdir(os.path.join(path, directory))
 
 
+def _delete_local_folder_contents(path, delete_subfolders):
+    if not os.path.isdir(path):
+        return
+    for entry in os.listdir(path):
+        entry_path = os.path.join(path, entry)
+        is_dir = os.path.isdir(entry_path)
+        if is_dir and not delete_subfolders:
+            continue
+        try:
+            if is_dir and os.path.islink(entry_path):
+                # shutil.rmtree refuses symbolic links, remove only the link
+                # (on Windows a symbolic link to a folder is removed as a folder)
+                if os.name == 'nt':
+                    os.rmdir(entry_path)
+                else:
+                    os.unlink(entry_path)
+            elif is_dir:
+                shutil.rmtree(entry_path, onerror=_log_rmtree_error)
+            else:
+                os.remove(entry_path)
+        except OSError as exc:
+            # Like xbmcvfs.delete, do not stop with entries that can not be deleted
+            error('Failed to delete {}: {}', entry_path, exc)
+
+
+def _log_rmtree_error(func, path, exc_info):
+    """onerror callback of shutil.rmtree"""
+    error('Failed to delete {} ({}): {}', path, func.__name__, exc_info[1])
+
+
 def delete_ndb_files(data_path=g.DATA_PATH):
     """Delete all .ndb files in a folder"""
     for filename in list_dir(data_path)[1]:
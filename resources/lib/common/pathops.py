@@ -16,9 +16,9 @@ def get_path(path, search_space, include_key=False):
     if not isinstance(path, (tuple, list)):
         path = [path]
     current_value = search_space[path[0]]
-    if len(path) == 1:
-        return (path[0], current_value) if include_key else current_value
-    return get_path(path[1:], current_value, include_key)
+    for key in path[1:]:
+        current_value = current_value[key]
+    return (path[-1], current_value) if include_key else current_value
 
 
 def get_path_safe(path, search_space, include_key=False, default=None):
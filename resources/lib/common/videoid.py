@@ -51,7 +51,10 @@ class VideoId(object):
         self._id_values = _get_unicode_kwargs(kwargs)
         # debug('VideoId validation values: {}'.format(self._id_values))
         self._validate()
-        self._menu_parameters = MenuIdParameters(id_values=self._assigned_id_values()[0])
+        # The id values never change, so the derived values can be computed once
+        self._value = self._assigned_id_values()[0]
+        self._as_list = None
+        self._menu_parameters = MenuIdParameters(id_values=self._value)
 
     def _validate(self):
         validation_mask = 0
@@ -109,7 +112,7 @@ class VideoId(object):
     @property
     def value(self):
         """The value of this VideoId"""
-        return self._assigned_id_values()[0]
+        return self._value
 
     @property
     def menu_parameters(self):
@@ -187,11 +190,11 @@ class VideoId(object):
         return pathitems
 
     def to_list(self):
-        """Generate a list representation that can be used with get_path"""
-        path = self._assigned_id_values()
-        if len(path) > 1:
-            path.reverse()
-        return path
+        """Generate a list representation that can be used with get_path
+        (the result is cached and returned as tuple, so it cannot be modified)"""
+        if self._as_list is None:
+            self._as_list = tuple(reversed(self._assigned_id_values()))
+        return self._as_list
 
     def to_dict(self):
         """Return a dict containing the relevant properties of this
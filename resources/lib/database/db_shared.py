@@ -282,19 +282,29 @@ def get_shareddb_class(use_mysql=False):
         @db_base_sqlite.handle_connection
         def insert_season(self, tvshowid, seasonid):
             """Insert a season if not exists"""
-            if not self.season_id_exists(tvshowid, seasonid):
-                insert_query = ('INSERT INTO video_lib_seasons (TvShowID, SeasonID) '
+            # Rely on the primary key to ignore existing rows, this avoids a preliminary existence check
+            if self.is_mysql_database:
+                insert_query = ('INSERT IGNORE INTO video_lib_seasons (TvShowID, SeasonID) '
+                                'VALUES (?, ?)')
+            else:
+                insert_query = ('INSERT OR IGNORE INTO video_lib_seasons (TvShowID, SeasonID) '
                                 'VALUES (?, ?)')
-                self._execute_non_query(insert_query, (tvshowid, seasonid))
+            self._execute_non_query(insert_query, (tvshowid, seasonid))
 
         @db_base_mysql.handle_connection
         @db_base_sqlite.handle_connection
         def insert_episode(self, tvshowid, seasonid, episodeid, file_path):
             """Insert a episode if not exists"""
-            if not self.episode_id_exists(tvshowid, seasonid, episodeid):
-                insert_query = ('INSERT INTO video_lib_episodes (SeasonID, EpisodeID, FilePath) '
+            # pylint: disable=unused-argument
+            # Rely on the primary key to ignore existing rows, this avoids the existence check
+            # that joins the episodes table with seasons and tvshows tables
+            if self.is_mysql_database:
+                insert_query = ('INSERT IGNORE INTO video_lib_episodes (SeasonID, EpisodeID, FilePath) '
+                                'VALUES (?, ?, ?)')
+            else:
+                insert_query = ('INSERT OR IGNORE INTO video_lib_episodes (SeasonID, EpisodeID, FilePath) '
                                 'VALUES (?, ?, ?)')
-                self._execute_non_query(insert_query, (seasonid, episodeid, file_path))
+            self._execute_non_query(insert_query, (seasonid, episodeid, file_path))
 
         @db_base_mysql.handle_connection
         @db_base_sqlite.handle_connection
@@ -21,7 +21,8 @@ import resources.lib.kodi.ui as ui
 from resources.lib.api.paths import MAX_PATH_REQUEST_SIZE
 from resources.lib.globals import g
 from resources.lib.kodi.library_items import (export_item, remove_item, export_new_item, get_item,
-                                              ItemNotFound, FOLDER_MOVIES, FOLDER_TV, library_path)
+                                              ItemNotFound, FOLDER_MOVIES, FOLDER_TV, library_path,
+                                              library_transaction)
 from resources.lib.kodi.library_tasks import compile_tasks, execute_tasks
 
 
@@ -115,11 +116,12 @@ def export_new_episodes(videoid, silent=False, nfo_settings=None):
 def execute_library_tasks(videoid, task_handlers, title, sync_mylist=True, nfo_settings=None):
     """Execute library tasks for videoid and show errors in foreground"""
     for task_handler in task_handlers:
-        execute_tasks(title=title,
-                      tasks=compile_tasks(videoid, task_handler, nfo_settings),
-                      task_handler=task_handler,
-                      notify_errors=True,
-                      library_home=library_path())
+        with library_transaction():
+            execute_tasks(title=title,
+                          tasks=compile_tasks(videoid, task_handler, nfo_settings),
+                          task_handler=task_handler,
+                          notify_errors=True,
+                          library_home=library_path())
 
         # Exclude update operations
         if task_handlers != [remove_item, export_item]:
@@ -132,13 +134,14 @@ def execute_library_tasks_silently(videoid, task_handlers, title=None,
     """Execute library tasks for videoid and don't show any GUI feedback"""
     # pylint: disable=unused-argument
     for task_handler in task_handlers:
-        for task in compile_tasks(videoid, task_handler, nfo_settings):
-            try:
-                task_handler(task, library_path())
-            except Exception:  # pylint: disable=broad-except
-                import traceback
-                common.error(traceback.format_exc())
-                common.error('{} of {} failed', task_handler.__name__, task['title'])
+        with library_transaction():
+            for task in compile_tasks(videoid, task_handler, nfo_settings):
+                try:
+                    task_handler(task, library_path())
+                except Exception:  # pylint: disable=broad-except
+                    import traceback
+                    common.error(traceback.format_exc())
+                    common.error('{} of {} failed', task_handler.__name__, task.title)
         if sync_mylist and (task_handlers != [remove_item, export_item]):
             _sync_mylist(videoid, task_handler, sync_mylist)
 
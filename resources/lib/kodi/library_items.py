@@ -11,7 +11,10 @@ from __future__ import absolute_import, division, unicode_literals
 
 import os
 import re
+import sys
 import xml.etree.ElementTree as ET
+from contextlib import contextmanager
+from itertools import islice
 
 import xbmc
 import xbmcvfs
@@ -22,11 +25,20 @@ import resources.lib.kodi.ui as ui
 from resources.lib.api.exceptions import MetadataNotAvailable
 from resources.lib.globals import g
 
+if sys.version_info >= (3, 6):
+    # Only from Python 3.6 the scandir iterator can be closed with a context manager
+    from os import scandir
+else:
+    scandir = None
+
 LIBRARY_HOME = 'library'
 FOLDER_MOVIES = 'movies'
 FOLDER_TV = 'shows'
 ILLEGAL_CHARACTERS = '[<|>|"|?|$|!|:|#|*]'
 
+# Database writes already done in the current library transaction (None when not in a transaction)
+__TRANSACTION_WRITES__ = None
+
 
 class ItemNotFound(Exception):
     """The requested item could not be found in the Kodi library"""
@@ -73,8 +85,9 @@ def _get_item(mediatype, filename):
     # make the filename legal
     fname = xbmc.makeLegalFilename(filename)
     untranslated_path = os.path.dirname(g.py2_decode(fname))
-    translated_path = os.path.dirname(g.py2_decode(xbmc.translatePath(fname)))
-    shortname = os.path.basename(g.py2_decode(xbmc.translatePath(fname)))
+    translated_fname = g.py2_decode(xbmc.translatePath(fname))
+    translated_path = os.path.dirname(translated_fname)
+    shortname = os.path.basename(translated_fname)
     # We get the data from Kodi library using filters.
     # This is much faster than loading all episodes in memory
 
@@ -150,31 +163,72 @@ def export_item(item_task, library_home):
     """Create strm file for an item and add it to the library"""
     # Paths must be legal to ensure NFS compatibility
     destination_folder = g.py2_decode(xbmc.makeLegalFilename('/'.join(
-        [library_home, item_task['section'], item_task['destination']])))
+        [library_home, item_task.section, item_task.destination])))
     _create_destination_folder(destination_folder)
-    if item_task['is_strm']:
+    if item_task.is_strm:
         export_filename = g.py2_decode(xbmc.makeLegalFilename('/'.join(
-            [destination_folder, item_task['filename'] + '.strm'])))
-        _add_to_library(item_task['videoid'], export_filename, (item_task['nfo_data'] is not None))
+            [destination_folder, item_task.filename + '.strm'])))
+        _add_to_library(item_task.videoid, export_filename, (item_task.nfo_data is not None))
         _write_strm_file(item_task, export_filename)
-    if item_task['nfo_data'] is not None:
+    if item_task.nfo_data is not None:
         nfo_filename = g.py2_decode(xbmc.makeLegalFilename('/'.join(
-            [destination_folder, item_task['filename'] + '.nfo'])))
-        _write_nfo_file(item_task['nfo_data'], nfo_filename)
-    common.debug('Exported {}', item_task['title'])
+            [destination_folder, item_task.filename + '.nfo'])))
+        _write_nfo_file(item_task.nfo_data, nfo_filename)
+    common.debug('Exported {}', item_task.title)
 
 
 def _create_destination_folder(destination_folder):
     """Create destination folder, ignore error if it already exists"""
+    # All episodes of a season share the same folder, check it only once per library transaction
+    if _is_done('folder', destination_folder):
+        return
     if not common.folder_exists(destination_folder):
         xbmcvfs.mkdirs(destination_folder)
+    _mark_done('folder', destination_folder)
+
+
+@contextmanager
+def library_transaction():
+    """
+    Context manager to group the export of multiple items,
+    during the transaction the tv show and season records are written to the database
+    only once, instead of once for each exported episode
+    """
+    # pylint: disable=global-statement
+    global __TRANSACTION_WRITES__
+    if __TRANSACTION_WRITES__ is not None:
+        # Already in a transaction
+        yield
+        return
+    __TRANSACTION_WRITES__ = set()
+    try:
+        yield
+    finally:
+        __TRANSACTION_WRITES__ = None
+
+
+def _is_done(*write_data):
+    """Return True if the same write has already been done in the current library transaction"""
+    return __TRANSACTION_WRITES__ is not None and write_data in __TRANSACTION_WRITES__
+
+
+def _mark_done(*write_data):
+    """Record a successful write in the current library transaction"""
+    if __TRANSACTION_WRITES__ is not None:
+        __TRANSACTION_WRITES__.add(write_data)
 
 
 def _add_to_library(videoid, export_filename, nfo_export, exclude_update=False):
     """Add an exported file to the library"""
     if videoid.mediatype == common.VideoId.EPISODE:
-        g.SHARED_DB.set_tvshow(videoid.tvshowid, nfo_export, exclude_update)
-        g.SHARED_DB.insert_season(videoid.tvshowid, videoid.seasonid)
+        # Mark the writes as done only after the database call succeeds,
+        # so that if it fails the next episodes will try again
+        if not _is_done('tvshow', videoid.tvshowid, nfo_export, exclude_update):
+            g.SHARED_DB.set_tvshow(videoid.tvshowid, nfo_export, exclude_update)
+            _mark_done('tvshow', videoid.tvshowid, nfo_export, exclude_update)
+        if not _is_done('season', videoid.tvshowid, videoid.seasonid):
+            g.SHARED_DB.insert_season(videoid.tvshowid, videoid.seasonid)
+            _mark_done('season', videoid.tvshowid, videoid.seasonid)
         g.SHARED_DB.insert_episode(videoid.tvshowid, videoid.seasonid,
                                    videoid.value, export_filename)
     elif videoid.mediatype == common.VideoId.MOVIE:
@@ -183,10 +237,16 @@ def _add_to_library(videoid, export_filename, nfo_export, exclude_update=False):
 
 def _write_strm_file(item_task, export_filename):
     """Write the playable URL to a strm file"""
-    filehandle = xbmcvfs.File(xbmc.translatePath(export_filename), 'wb')
+    url = common.build_url(videoid=item_task.videoid, mode=g.MODE_PLAY).encode('utf-8')
+    translated_filename = xbmc.translatePath(export_filename)
+    if common.is_local_path(translated_filename):
+        # With a local file system path avoid the overhead of xbmcvfs
+        with open(g.py2_decode(translated_filename), 'wb') as filehandle:
+            filehandle.write(url)
+        return
+    filehandle = xbmcvfs.File(translated_filename, 'wb')
     try:
-        filehandle.write(bytearray(common.build_url(videoid=item_task['videoid'],
-                                                    mode=g.MODE_PLAY).encode('utf-8')))
+        filehandle.write(bytearray(url))
     finally:
         filehandle.close()
 
@@ -206,13 +266,14 @@ def remove_item(item_task, library_home=None):
     """Remove an item from the library and delete if from disk"""
     # pylint: disable=unused-argument, broad-except
 
-    common.info('Removing {} from library', item_task['title'])
+    common.info('Removing {} from library', item_task.title)
 
-    exported_filename = g.py2_decode(xbmc.translatePath(item_task['filepath']))
-    videoid = item_task['videoid']
+    exported_filename = g.py2_decode(xbmc.translatePath(item_task.filepath))
+    videoid = item_task.videoid
     common.debug('VideoId: {}', videoid)
     try:
-        parent_folder = g.py2_decode(xbmc.translatePath(os.path.dirname(exported_filename)))
+        # exported_filename is already translated
+        parent_folder = os.path.dirname(exported_filename)
         if xbmcvfs.exists(exported_filename):
             xbmcvfs.delete(exported_filename)
         else:
@@ -221,16 +282,15 @@ def remove_item(item_task, library_home=None):
         nfo_file = os.path.splitext(exported_filename)[0] + '.nfo'
         if xbmcvfs.exists(nfo_file):
             xbmcvfs.delete(nfo_file)
-        dirs, files = xbmcvfs.listdir(parent_folder)
-        tvshow_nfo_file = g.py2_decode(xbmc.makeLegalFilename('/'.join([parent_folder, 'tvshow.nfo'])))
-        # Remove tvshow_nfo_file only when is the last file
+        # Reading at most two entries is enough to decide what to do with the parent folder
+        entries = _get_folder_head_entries(parent_folder, 2)
+        # Remove tvshow.nfo file only when is the last file
         # (users have the option of removing even single seasons)
-        if xbmcvfs.exists(tvshow_nfo_file) and not dirs and len(files) == 1:
-            xbmcvfs.delete(tvshow_nfo_file)
-            # Delete parent folder
-            xbmcvfs.rmdir(parent_folder)
+        if entries == ['tvshow.nfo']:
+            xbmcvfs.delete(g.py2_decode(xbmc.makeLegalFilename('/'.join([parent_folder, 'tvshow.nfo']))))
+            entries = []
         # Delete parent folder when empty
-        if not dirs and not files:
+        if not entries:
             xbmcvfs.rmdir(parent_folder)
 
         _remove_videoid_from_db(videoid)
@@ -242,6 +302,19 @@ def remove_item(item_task, library_home=None):
         ui.show_addon_error_info(exc)
 
 
+def _get_folder_head_entries(folder, max_entries):
+    """Return up to max_entries names of the files and subfolders contained in a folder,
+    with a local file system path only the needed entries are read"""
+    if not common.is_local_path(folder):
+        dirs, files = xbmcvfs.listdir(folder)
+        return (dirs + files)[:max_entries]
+    if scandir is None:
+        return os.listdir(folder)[:max_entries]
+    # The iterator must be closed, it is not exhausted and would keep the folder open
+    with scandir(folder) as folder_entries:
+        return [entry.name for entry in islice(folder_entries, max_entries)]
+
+
 def _remove_videoid_from_db(videoid):
     """Removes records from database in relation to a videoid"""
     if videoid.mediatype == common.VideoId.MOVIE:
@@ -12,6 +12,7 @@ from __future__ import absolute_import, division, unicode_literals
 
 import os
 import re
+from itertools import chain
 
 import xbmcgui
 
@@ -26,6 +27,32 @@ from resources.lib.kodi.library_items import (export_item, remove_item, export_n
 from resources.lib.kodi.ui import show_library_task_errors
 
 
+class ExportTask(object):
+    """A task to export an item to the library"""
+    # A full tv show can generate thousands of tasks, __slots__ makes each one lighter than a dict
+    __slots__ = ('title', 'section', 'videoid', 'destination', 'filename', 'nfo_data', 'is_strm')
+
+    def __init__(self, title, section, videoid, destination, filename, nfo_data, is_strm):
+        # pylint: disable=too-many-arguments
+        self.title = title
+        self.section = section
+        self.videoid = videoid
+        self.destination = destination
+        self.filename = filename
+        self.nfo_data = nfo_data
+        self.is_strm = is_strm
+
+
+class RemoveTask(object):
+    """A task to remove an item from the library"""
+    __slots__ = ('title', 'filepath', 'videoid')
+
+    def __init__(self, title, filepath, videoid):
+        self.title = title
+        self.filepath = filepath
+        self.videoid = videoid
+
+
 def execute_tasks(title, tasks, task_handler, **kwargs):
     """
     Run all tasks through task_handler and display a progress dialog in the GUI. Additional kwargs will be
@@ -37,14 +64,12 @@ def execute_tasks(title, tasks, task_handler, **kwargs):
     progress = xbmcgui.DialogProgress()
     progress.create(title)
     for task_num, task in enumerate(tasks):
-        task_title = task.get('title', 'Unknown Task')
+        task_title = task.title
         progress.update(percent=int(task_num * 100 / len(tasks)),
                         line1=task_title)
 #        xbmc.sleep(25)
         if progress.iscanceled():
             break
-        if not task:
-            continue
         try:
             task_handler(task, **kwargs)
         except Exception as exc:  # pylint: disable=broad-except
@@ -88,7 +113,7 @@ def compile_tasks(videoid, task_handler, nfo_settings=None):
     except MetadataNotAvailable:
         common.warn('compile_tasks: task_handler {} unavailable metadata for {} task skipped',
                     task_handler, videoid)
-        return [{}]
+        return []
     if task is None:
         common.warn('compile_tasks: task_handler {} did not match any task for {}',
                     task_handler, videoid)
@@ -141,11 +166,10 @@ def _create_export_tv_tasks(videoid, metadata, nfo_settings):
 def _compile_export_show_tasks(videoid, show, nfo_settings):
     """Compile a list of task items for all episodes of all seasons
     of a tvshow"""
-    # This nested comprehension is nasty but necessary. It flattens
-    # the task lists for each season into one list
-    return [task for season in show['seasons']
-            for task in _compile_export_season_tasks(
-                videoid.derive_season(season['id']), show, season, nfo_settings)]
+    # Flattens the task lists for each season into one list
+    return list(chain.from_iterable(
+        _compile_export_season_tasks(videoid.derive_season(season['id']), show, season, nfo_settings)
+        for season in show['seasons']))
 
 
 def _compile_export_season_tasks(videoid, show, season, nfo_settings):
@@ -157,7 +181,7 @@ def _compile_export_season_tasks(videoid, show, season, nfo_settings):
 
 def _create_export_episode_task(videoid, episode, season, show, nfo_settings):
     """Export a single episode to the library"""
-    filename = 'S{:02d}E{:02d}'.format(season['seq'], episode['seq'])
+    filename = 'S%02dE%02d' % (season['seq'], episode['seq'])
     title = ' - '.join((show['title'], filename, episode['title']))
     return _create_export_item_task(
         title, FOLDER_TV, videoid, show['title'], filename,
@@ -168,31 +192,31 @@ def _create_export_episode_task(videoid, episode, season, show, nfo_settings):
 def _create_export_item_task(title, section, videoid, destination, filename, nfo_data=None,
                              is_strm=True):
     """Create a single task item"""
-    return {
-        'title': title,
-        'section': section,
-        'videoid': videoid,
-        'destination': re.sub(ILLEGAL_CHARACTERS, '', destination),
-        'filename': re.sub(ILLEGAL_CHARACTERS, '', filename),
-        'nfo_data': nfo_data,
-        'is_strm': is_strm
-    }
+    return ExportTask(title, section, videoid,
+                      re.sub(ILLEGAL_CHARACTERS, '', destination),
+                      re.sub(ILLEGAL_CHARACTERS, '', filename),
+                      nfo_data, is_strm)
 
 
 def _create_new_episodes_tasks(videoid, metadata, nfo_settings=None):
     tasks = []
     if metadata and 'seasons' in metadata[0]:
+        # Get all the exported episodes with a single query,
+        # instead of checking the existence of each season and episode separately
+        exported_episodes = {}
+        for row in g.SHARED_DB.get_all_episodes_ids_and_filepath_from_tvshow(videoid.value):
+            exported_episodes.setdefault(int(row['SeasonID']), set()).add(int(row['EpisodeID']))
         for season in metadata[0]['seasons']:
             if not nfo_settings:
                 nfo_export = g.SHARED_DB.get_tvshow_property(videoid.value,
                                                              VidLibProp['nfo_export'], False)
                 nfo_settings = nfo.NFOSettings(nfo_export)
 
-            if g.SHARED_DB.season_id_exists(videoid.value, season['id']):
+            if int(season['id']) in exported_episodes:
                 # The season exists, try to find any missing episode
+                season_episodes = exported_episodes[int(season['id'])]
                 for episode in season['episodes']:
-                    if not g.SHARED_DB.episode_id_exists(
-                            videoid.value, season['id'], episode['id']):
+                    if int(episode['id']) not in season_episodes:
                         tasks.append(_create_export_episode_task(
                             videoid=videoid.derive_season(
                                 season['id']).derive_episode(episode['id']),
@@ -252,11 +276,7 @@ def _create_remove_tv_tasks(row_results):
 
 def _create_remove_item_task(title, filepath, videoid):
     """Create a single task item"""
-    return {
-        'title': title,
-        'filepath': filepath,
-        'videoid': videoid
-    }
+    return RemoveTask(title, filepath, videoid)
 
 
 def _episode_title_from_path(filepath):